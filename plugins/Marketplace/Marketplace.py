@@ -106,11 +106,11 @@ class Marketplace(Extension, QObject):
         if self._window is None:
             return
 
-        if self._package_manager.hasPackagesToRemoveOrInstall or \
-                PluginRegistry.getInstance().getCurrentSessionActivationChangedPlugins():
-            self._restart_needed = True
-        else:
-            self._restart_needed = False
+        restart_needed = bool(self._package_manager.hasPackagesToRemoveOrInstall or
+                              PluginRegistry.getInstance().getCurrentSessionActivationChangedPlugins())
+        if restart_needed == self._restart_needed:
+            return  # Don't make QML re-evaluate the notification if nothing changed.
+        self._restart_needed = restart_needed
         self.showRestartNotificationChanged.emit()
 
     showRestartNotificationChanged = pyqtSignal()
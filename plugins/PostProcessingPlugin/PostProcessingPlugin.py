@@ -2,14 +2,15 @@
 # The PostProcessingPlugin is released under the terms of the LGPLv3 or higher.
 
 import configparser  # The script lists are stored in metadata as serialised config files.
+from contextlib import contextmanager
 import importlib.util
-import io  # To allow configparser to write to a string.
+import io  # To pass g-code to scripts as a stream.
 import os.path
-import pkgutil
+import re
 import sys
-from typing import Dict, Type, TYPE_CHECKING, List, Optional, cast
+from typing import Any, Dict, Iterable, Iterator, Type, TYPE_CHECKING, List, Optional, Tuple, cast
 
-from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot
+from PyQt6.QtCore import QFileSystemWatcher, QModelIndex, QObject, QStringListModel, QUrl, pyqtProperty, pyqtSignal, pyqtSlot
 
 from UM.Application import Application
 from UM.Extension import Extension
@@ -23,10 +24,132 @@ from cura.CuraApplication import CuraApplication
 
 i18n_catalog = i18nCatalog("cura")
 
+_LAYER_START_REGEX = re.compile(r"^(?=;LAYER:)", re.MULTILINE)  # Where the g-code of each layer starts.
+
+# Escape sequences of the serialised scripts, replaced in a single pass. Newlines are escaped because configparser sees
+# those as section delimiters. When unescaping, escaped newlines take precedence over escaped backslashes.
+_ESCAPE_REGEX = re.compile(r"\\\\|\n")
+_ESCAPE_SEQUENCES = {"\\\\": r"\\\\", "\n": r"\\\n"}
+_UNESCAPE_REGEX = re.compile(r"\\\\\\n|\\\\\\\\(?!\\{0,2}n)")
+_UNESCAPE_SEQUENCES = {r"\\\n": "\n", r"\\\\": "\\\\"}
+
 if TYPE_CHECKING:
     from .Script import Script
 
 
+def _serializeScript(script_key: str, setting_values: Iterable[Tuple[str, Any]]) -> str:
+    """Serialise the settings of a script as a config with one section, without escaping it yet.
+
+    The section header is the key of the script and its values are the settings. This is written in the same format
+    that ConfigParser writes, without the overhead of creating one.
+    :param script_key: The key of the script.
+    :param setting_values: The key and value of each setting of the script, in order.
+    :return: The serialised script.
+    """
+    serialized = ["[{script_name}]\n".format(script_name = script_key)]
+    for key, value in setting_values:
+        value = str(value).replace("\n", "\n\t")  # Multi-line values continue on indented lines.
+        serialized.append("{key} = {value}\n".format(key = key, value = value))
+    serialized.append("\n")
+    return "".join(serialized)
+
+
+def _escapeScript(script_str: str) -> str:
+    """Escape the backslashes and newlines of a serialised script, so that the scripts can be stored on separate lines."""
+
+    return _ESCAPE_REGEX.sub(lambda match: _ESCAPE_SEQUENCES[match.group()], script_str)
+
+
+def _unescapeScript(script_str: str) -> str:
+    """Undo the escaping of a stored script, to get the serialised script back."""
+
+    return _UNESCAPE_REGEX.sub(lambda match: _UNESCAPE_SEQUENCES[match.group()], script_str)
+
+
+def _findSectionStart(gcode: str, section: str, start: int, end: int) -> int:
+    """Find where a section of g-code that isn't a layer starts again in the processed g-code, by its first line.
+
+    :param gcode: The processed g-code.
+    :param section: The original section.
+    :param start: The start of the previous section. The section is only searched for after it.
+    :param end: Where to stop searching for the section.
+    :return: The position of the section, or ``end`` if its first line couldn't be found.
+    """
+    first_line = section[:section.find("\n") + 1] if "\n" in section else section
+    position = gcode.find("\n" + first_line, start, end)
+    if position < 0:
+        Logger.log("w", "Could not find the start of a g-code section after post-processing: %s", first_line.strip())
+        return end
+    return position + 1
+
+
+def _splitGCode(gcode: str, gcode_list: List[str]) -> List[str]:
+    """Split processed g-code into sections again, like the list of sections it was made from.
+
+    If the scripts didn't change the g-code, the original sections are returned. Otherwise layers are split where a line
+    starts with ``;LAYER:``, so there are as many layers as the processed g-code has. The sections before the first
+    layer and after the last layer, like the header, start g-code and end g-code, are found by their length if they
+    weren't changed, or else by their first line. Empty sections can't be found again, so those are left out.
+    :param gcode: The processed g-code.
+    :param gcode_list: The sections of the g-code before it was processed.
+    :return: The processed g-code, per section.
+    """
+    position = 0
+    for section in gcode_list:
+        if not gcode.startswith(section, position):
+            break
+        position += len(section)
+    else:
+        if position == len(gcode):  # Nothing changed, so the sections didn't either.
+            return list(gcode_list)
+
+    gcode_list = [section for section in gcode_list if section]
+    is_layer = [section.startswith(";LAYER:") for section in gcode_list]
+    if True in is_layer:
+        num_leading = is_layer.index(True)
+        num_trailing = is_layer[::-1].index(True)
+    else:
+        num_leading = len(gcode_list)
+        num_trailing = 0
+    layer_starts = [match.start() for match in _LAYER_START_REGEX.finditer(gcode)]
+
+    # The header and start g-code, up to the first layer.
+    leading_end = layer_starts[0] if layer_starts and num_leading < len(gcode_list) else len(gcode)
+    boundaries = [0]
+    for section, next_section in zip(gcode_list, gcode_list[1:num_leading]):
+        section_start = boundaries[-1]
+        if gcode.startswith(section, section_start) and section_start + len(section) <= leading_end:  # Unchanged.
+            boundaries.append(section_start + len(section))
+        else:
+            boundaries.append(_findSectionStart(gcode, next_section, section_start, leading_end))
+
+    # The end g-code, after the last layer. Unchanged sections are found from the end of the g-code.
+    trailing_sections = gcode_list[len(gcode_list) - num_trailing:]
+    trailing_starts = []  # type: List[int]
+    trailing_end = len(gcode)
+    while trailing_sections:
+        section_start = trailing_end - len(trailing_sections[-1])
+        if section_start < leading_end or not gcode.startswith(trailing_sections[-1], section_start):
+            break
+        trailing_sections.pop()
+        trailing_end = section_start
+        trailing_starts.insert(0, section_start)
+    # The changed ones are found by their first line, after the last layer.
+    changed_starts = []  # type: List[int]
+    trailing_start = max([position for position in layer_starts if position < trailing_end], default = leading_end)
+    for section in trailing_sections:
+        trailing_start = _findSectionStart(gcode, section, trailing_start, trailing_end)
+        changed_starts.append(trailing_start)
+    trailing_starts = changed_starts + trailing_starts
+
+    if num_leading < len(gcode_list):
+        layers_end = trailing_starts[0] if trailing_starts else len(gcode)
+        boundaries.extend([position for position in layer_starts if boundaries[-1] < position < layers_end])
+    boundaries.extend(trailing_starts)
+    boundaries.append(len(gcode))
+    return [gcode[section_start:section_end] for section_start, section_end in zip(boundaries, boundaries[1:])]
+
+
 class PostProcessingPlugin(QObject, Extension):
     """Extension type plugin that enables pre-written scripts to post process g-code files."""
     def __init__(self, parent = None) -> None:
@@ -35,20 +158,39 @@ class PostProcessingPlugin(QObject, Extension):
         self.setMenuName(i18n_catalog.i18nc("@item:inmenu", "Post Processing"))
         self.addMenuItem(i18n_catalog.i18nc("@item:inmenu", "Modify G-Code"), self.showPopup)
         self._view = None
+        self._view_shell = None  # Loads the view in the background. The view is only available once it has loaded.
+        self._show_view_when_loaded = False
 
         # Loaded scripts are all scripts that can be used
         self._loaded_scripts = {}  # type: Dict[str, Type[Script]]
         self._script_labels = {}  # type: Dict[str, str]
-
-        # Script list contains instances of scripts in loaded_scripts.
+        self._script_setting_keys = {}  # type: Dict[str, Tuple[str, ...]]  # Keys of the settings of each loaded script, in order.
+        self._loaded_script_list_cache = None  # type: Optional[List[str]]  # Sorted keys of the loaded scripts, or None if outdated.
+        self._loaded_script_list_model = QStringListModel(self)  # The same sorted keys, as a model for QML.
+        self._scripts_loaded = False  # Whether the script folders were already searched for scripts.
+        self._script_folder_watcher = QFileSystemWatcher(self)  # To search the script folders again only if they changed.
+        self._script_folder_watcher.directoryChanged.connect(self._onScriptFolderChanged)
+
+        # Script list contains instances of scripts in loaded_scripts, with their keys in a parallel list.
         # There can be duplicates, which will be executed in sequence.
-        self._script_list = []  # type: List[Script]
+        self._script_instances = []  # type: List[Script]
+        self._script_keys = []  # type: List[str]
+        self._script_list_model = QStringListModel(self)  # The same keys, as a model for QML. Updated per row that changes.
+        self._setting_data_cache = {}  # type: Dict[int, Dict[str, Any]]  # Setting data of the scripts in the script list, by id of the script.
         self._selected_script_index = -1
+
+        # While the script list is being changed, change notifications are collected here and emitted once afterwards.
+        self._in_mutation_scope = False
+        self._dirty_script_list = False
+        self._dirty_selection = False
+        self._dirty_property = False
+
         self._global_container_stack = Application.getInstance().getGlobalContainerStack()
         if self._global_container_stack:
             self._global_container_stack.metaDataChanged.connect(self._restoreScriptInforFromMetadata)
 
-        Application.getInstance().getOutputDeviceManager().writeStarted.connect(self.execute)
+        # Executing the scripts when writing g-code is only connected once there are scripts in the list.
+        self._execute_connected = False
         Application.getInstance().globalContainerStackChanged.connect(self._onGlobalContainerStackChanged)  # When the current printer changes, update the list of scripts.
         CuraApplication.getInstance().mainWindowChanged.connect(self._createView)  # When the main window is created, create the view so that we can display the post-processing icon if necessary.
 
@@ -57,14 +199,14 @@ class PostProcessingPlugin(QObject, Extension):
     @pyqtProperty(str, notify = selectedIndexChanged)
     def selectedScriptDefinitionId(self) -> Optional[str]:
         try:
-            return self._script_list[self._selected_script_index].getDefinitionId()
+            return self._script_instances[self._selected_script_index].getDefinitionId()
         except IndexError:
             return ""
 
     @pyqtProperty(str, notify=selectedIndexChanged)
     def selectedScriptStackId(self) -> Optional[str]:
         try:
-            return self._script_list[self._selected_script_index].getStackId()
+            return self._script_instances[self._selected_script_index].getStackId()
         except IndexError:
             return ""
 
@@ -73,9 +215,7 @@ class PostProcessingPlugin(QObject, Extension):
 
         scene = Application.getInstance().getController().getScene()
         # If the scene does not have a gcode, do nothing
-        if not hasattr(scene, "gcode_dict"):
-            return
-        gcode_dict = getattr(scene, "gcode_dict")
+        gcode_dict = scene.__dict__.get("gcode_dict")  # Set on the scene by the back-end, so it's an instance attribute.
         if not gcode_dict:
             return
 
@@ -86,28 +226,53 @@ class PostProcessingPlugin(QObject, Extension):
             return
 
         if ";POSTPROCESSED" not in gcode_list[0]:
-            for script in self._script_list:
-                try:
-                    gcode_list = script.execute(gcode_list)
-                except Exception:
-                    Logger.logException("e", "Exception in post-processing script.")
-            if len(self._script_list):  # Add comment to g-code if any changes were made.
+            if self._script_instances and all(script.hasStreamSupport() for script in self._script_instances):
+                gcode_list = self._executeStreamed(gcode_list)
+            else:
+                for script in self._script_instances:
+                    try:
+                        gcode_list = script.execute(gcode_list)
+                    except Exception:
+                        Logger.logException("e", "Exception in post-processing script.")
+            if len(self._script_instances):  # Add comment to g-code if any changes were made.
                 gcode_list[0] += ";POSTPROCESSED\n"
-            # Add all the active post processor names to data[0]
+                # Add all the active post processor names to data[0]
                 pp_name_list = Application.getInstance().getGlobalContainerStack().getMetaDataEntry("post_processing_scripts")
                 for pp_name in pp_name_list.split("\n"):
                     pp_name = pp_name.split("]")
                     gcode_list[0] += ";  " + str(pp_name[0]) + "]\n"
-            gcode_dict[active_build_plate_id] = gcode_list
-            setattr(scene, "gcode_dict", gcode_dict)
+                # Without any scripts nothing changed, so the g-code doesn't need to be stored again.
+                gcode_dict[active_build_plate_id] = gcode_list
+                setattr(scene, "gcode_dict", gcode_dict)
         else:
             Logger.log("e", "Already post processed")
 
+    def _executeStreamed(self, gcode_list: List[str]) -> List[str]:
+        """Execute all post-processing scripts on a single stream of g-code.
+
+        The g-code is only joined once and passed from script to script, instead of passing the list of layers. This
+        requires all scripts in the script list to support streams.
+        :param gcode_list: The g-code to process, per layer.
+        :return: The processed g-code, split again into the same sections as the original list.
+        """
+
+        stream = io.StringIO("".join(gcode_list))
+        for script in self._script_instances:
+            stream.seek(0)
+            try:
+                stream = script.executeStream(stream)
+            except Exception:
+                Logger.logException("e", "Exception in post-processing script.")
+        return _splitGCode(stream.getvalue(), gcode_list)
+
     @pyqtSlot(int)
     def setSelectedScriptIndex(self, index: int) -> None:
         if self._selected_script_index != index:
             self._selected_script_index = index
-            self.selectedIndexChanged.emit()
+            if self._in_mutation_scope:
+                self._dirty_selection = True
+            else:
+                self.selectedIndexChanged.emit()
 
     @pyqtProperty(int, notify = selectedIndexChanged)
     def selectedScriptIndex(self) -> int:
@@ -115,33 +280,42 @@ class PostProcessingPlugin(QObject, Extension):
 
     @pyqtSlot(int, int)
     def moveScript(self, index: int, new_index: int) -> None:
-        if new_index < 0 or new_index > len(self._script_list) - 1:
+        if new_index < 0 or new_index > len(self._script_instances) - 1:
             return  # nothing needs to be done
         else:
-            # Magical switch code.
-            self._script_list[new_index], self._script_list[index] = self._script_list[index], self._script_list[new_index]
-            self.scriptListChanged.emit()
-            self.selectedIndexChanged.emit() #Ensure that settings are updated
-            self._propertyChanged()
+            with self._mutationScope():
+                # Magical switch code.
+                self._script_instances[new_index], self._script_instances[index] = self._script_instances[index], self._script_instances[new_index]
+                self._script_keys[new_index], self._script_keys[index] = self._script_keys[index], self._script_keys[new_index]
+                self._script_list_model.setData(self._script_list_model.index(index), self._script_keys[index])
+                self._script_list_model.setData(self._script_list_model.index(new_index), self._script_keys[new_index])
+                self._dirty_script_list = True
+                self._dirty_selection = True  # Ensure that settings are updated
+                self._dirty_property = True
 
     @pyqtSlot(int)
     def removeScriptByIndex(self, index: int) -> None:
         """Remove a script from the active script list by index."""
 
-        self._script_list.pop(index)
-        if len(self._script_list) - 1 < self._selected_script_index:
-            self._selected_script_index = len(self._script_list) - 1
-        self.scriptListChanged.emit()
-        self.selectedIndexChanged.emit()  # Ensure that settings are updated
-        self._propertyChanged()
+        with self._mutationScope():
+            removed_script = self._script_instances.pop(index)
+            self._script_keys.pop(index)
+            self._setting_data_cache.pop(id(removed_script), None)
+            self._script_list_model.removeRows(index, 1, QModelIndex())
+            if len(self._script_instances) - 1 < self._selected_script_index:
+                self._selected_script_index = len(self._script_instances) - 1
+            self._dirty_script_list = True
+            self._dirty_selection = True  # Ensure that settings are updated
+            self._dirty_property = True
 
     def loadAllScripts(self) -> None:
         """Load all scripts from all paths where scripts can be found.
 
-        This should probably only be done on init.
+        This should probably only be done on init. It does nothing if the scripts were already loaded; use
+        reloadAllScripts to search the script folders again.
         """
 
-        if self._loaded_scripts: # Already loaded.
+        if self._scripts_loaded:  # Already loaded.
             return
 
         # Make sure a "scripts" folder exists in the main configuration folder and the preferences folder.
@@ -167,6 +341,33 @@ class PostProcessingPlugin(QObject, Extension):
             if not os.path.isdir(path):
                 continue
             self.loadScripts(path)
+            if path not in self._script_folder_watcher.directories():
+                self._script_folder_watcher.addPath(path)
+        self._scripts_loaded = True
+        loaded_script_list = self.loadedScriptList
+        if loaded_script_list != self._loaded_script_list_model.stringList():
+            self._loaded_script_list_model.setStringList(loaded_script_list)
+            self.loadedScriptListChanged.emit()
+
+    def _onScriptFolderChanged(self, path: str) -> None:
+        """Called when a script folder changed, so that the next call to loadAllScripts picks up new scripts."""
+
+        self._scripts_loaded = False
+
+    def reloadAllScripts(self) -> None:
+        """Forget all loaded scripts and load them again from all paths where scripts can be found.
+
+        Scripts that are in the active script list remain in use as they were.
+        """
+
+        for loaded_class in self._loaded_scripts.values():
+            sys.modules.pop(loaded_class.__name__, None)  # Otherwise loadScripts skips them as already loaded.
+        self._loaded_scripts.clear()
+        self._script_labels.clear()
+        self._script_setting_keys.clear()
+        self._loaded_script_list_cache = None
+        self._scripts_loaded = False
+        self.loadAllScripts()
 
     def loadScripts(self, path: str) -> None:
         """Load all scripts from provided path.
@@ -191,13 +392,15 @@ class PostProcessingPlugin(QObject, Extension):
             if not is_in_installation_path:
                 TrustBasics.removeCached(path)
 
-        scripts = pkgutil.iter_modules(path = [path])
+        # Only the source files are of interest. Their compiled bytecode in __pycache__ is still used by the loader.
+        script_files = sorted(entry.name for entry in os.scandir(path) if entry.name.endswith(".py") and entry.name != "__init__.py" and entry.is_file())
         """Load all scripts in the scripts folders"""
-        for loader, script_name, ispkg in scripts:
+        for script_file in script_files:
             # Iterate over all scripts.
+            script_name = script_file[:-len(".py")]
             if script_name not in sys.modules:
                 try:
-                    file_path = os.path.join(path, script_name + ".py")
+                    file_path = os.path.join(path, script_file)
                     if not self._isScriptAllowed(file_path):
                         Logger.warning("Skipped loading post-processing script {}: not trusted".format(file_path))
                         continue
@@ -218,23 +421,33 @@ class PostProcessingPlugin(QObject, Extension):
                     try:
                         setting_data = temp_object.getSettingData()
                         if "name" in setting_data and "key" in setting_data:
-                            self._script_labels[setting_data["key"]] = setting_data["name"]
-                            self._loaded_scripts[setting_data["key"]] = loaded_class
+                            script_key = setting_data["key"]
+                            self._script_labels[script_key] = setting_data["name"]
                         else:
                             Logger.log("w", "Script %s.py has no name or key", script_name)
-                            self._script_labels[script_name] = script_name
-                            self._loaded_scripts[script_name] = loaded_class
+                            script_key = script_name
+                            self._script_labels[script_key] = script_name
+                        self._loaded_scripts[script_key] = loaded_class
+                        self._script_setting_keys[script_key] = tuple(setting_data.get("settings", {}).keys())
                     except AttributeError:
                         Logger.log("e", "Script %s.py is not a recognised script type. Ensure it inherits Script", script_name)
                     except NotImplementedError:
                         Logger.log("e", "Script %s.py has no implemented settings", script_name)
                 except Exception as e:
                     Logger.logException("e", "Exception occurred while loading post processing plugin: {error_msg}".format(error_msg = str(e)))
+        self._loaded_script_list_cache = None
 
     loadedScriptListChanged = pyqtSignal()
     @pyqtProperty("QVariantList", notify = loadedScriptListChanged)
     def loadedScriptList(self) -> List[str]:
-        return sorted(list(self._loaded_scripts.keys()))
+        if self._loaded_script_list_cache is None:
+            self._loaded_script_list_cache = sorted(self._loaded_scripts.keys())
+        return self._loaded_script_list_cache
+
+    @pyqtProperty(QObject, constant = True)
+    def loadedScriptListModel(self) -> QStringListModel:
+        """The keys of all scripts that can be used, sorted, as a model for QML."""
+        return self._loaded_script_list_model
 
     @pyqtSlot(str, result = str)
     def getScriptLabelByKey(self, key: str) -> Optional[str]:
@@ -243,47 +456,109 @@ class PostProcessingPlugin(QObject, Extension):
     scriptListChanged = pyqtSignal()
     @pyqtProperty("QStringList", notify = scriptListChanged)
     def scriptList(self) -> List[str]:
-        script_list = [script.getSettingData()["key"] for script in self._script_list]
-        return script_list
+        return self._script_keys
+
+    @pyqtProperty(QObject, constant = True)
+    def scriptListModel(self) -> QStringListModel:
+        """The keys of the scripts in the script list, as a model for QML."""
+        return self._script_list_model
+
+    def _settingData(self, script: "Script") -> Dict[str, Any]:
+        """Get the setting data of a script in the script list, which is only constructed once per script."""
+
+        setting_data = self._setting_data_cache.get(id(script))
+        if setting_data is None:
+            setting_data = script.getSettingData()
+            self._setting_data_cache[id(script)] = setting_data
+        return setting_data
 
     @pyqtSlot(str)
     def addScriptToList(self, key: str) -> None:
         Logger.log("d", "Adding script %s to list.", key)
-        new_script = self._loaded_scripts[key]()
-        new_script.initialize()
-        self._script_list.append(new_script)
-        self.setSelectedScriptIndex(len(self._script_list) - 1)
-        self.scriptListChanged.emit()
-        self._propertyChanged()
+        with self._mutationScope():
+            new_script = self._loaded_scripts[key]()
+            new_script.initialize()
+            self._script_instances.append(new_script)
+            self._script_keys.append(key)
+            row = self._script_list_model.rowCount()
+            self._script_list_model.insertRows(row, 1, QModelIndex())
+            self._script_list_model.setData(self._script_list_model.index(row), key)
+            self.setSelectedScriptIndex(len(self._script_instances) - 1)
+            self._dirty_script_list = True
+            self._dirty_property = True
+
+    @contextmanager
+    def _mutationScope(self) -> Iterator[None]:
+        """Collects the change notifications of a change to the script list, to emit each of them once at the end.
+
+        Within the scope, set the _dirty_* flags instead of emitting the signals directly.
+        """
+
+        if self._in_mutation_scope:  # Already collecting for an outer scope.
+            yield
+            return
+        self._in_mutation_scope = True
+        dirty_script_list = dirty_selection = dirty_property = False
+        try:
+            yield
+            dirty_script_list = self._dirty_script_list
+            dirty_selection = self._dirty_selection
+            dirty_property = self._dirty_property
+        finally:
+            # Always reset, so that a change that failed halfway doesn't leak its flags into the next scope.
+            self._in_mutation_scope = False
+            self._dirty_script_list = False
+            self._dirty_selection = False
+            self._dirty_property = False
+
+        if dirty_script_list:
+            if self._script_instances:
+                self._connectExecute()
+            self.scriptListChanged.emit()
+        if dirty_selection:
+            self.selectedIndexChanged.emit()
+        if dirty_property:
+            self._propertyChanged()
+
+    def _connectExecute(self) -> None:
+        """Start executing the scripts whenever g-code is written, if that wasn't done yet."""
+
+        if not self._execute_connected:
+            Application.getInstance().getOutputDeviceManager().writeStarted.connect(self.execute)
+            self._execute_connected = True
 
     def _restoreScriptInforFromMetadata(self):
         self.loadAllScripts()
         new_stack = self._global_container_stack
         if new_stack is None:
             return
-        self._script_list.clear()
+        self._script_instances.clear()
+        self._script_keys.clear()
+        self._setting_data_cache.clear()
         if not new_stack.getMetaDataEntry("post_processing_scripts"):  # Missing or empty.
+            self._script_list_model.setStringList([])
             self.scriptListChanged.emit()  # Even emit this if it didn't change. We want it to write the empty list to the stack's metadata.
             self.setSelectedScriptIndex(-1)
             return
 
-        self._script_list.clear()
         scripts_list_strs = new_stack.getMetaDataEntry("post_processing_scripts")
+        script_parser = configparser.ConfigParser(interpolation=None)  # Re-used for every script, since constructing one is not free.
+        script_parser.optionxform = str  # type: ignore  # Don't transform the setting keys as they are case-sensitive.
         for script_str in scripts_list_strs.split(
                 "\n"):  # Encoded config files should never contain three newlines in a row. At most 2, just before section headers.
             if not script_str:  # There were no scripts in this one (or a corrupt file caused more than 3 consecutive newlines here).
                 continue
-            script_str = script_str.replace(r"\\\n", "\n").replace(r"\\\\", "\\\\")  # Unescape escape sequences.
-            script_parser = configparser.ConfigParser(interpolation=None)
-            script_parser.optionxform = str  # type: ignore  # Don't transform the setting keys as they are case-sensitive.
+            script_str = _unescapeScript(script_str)
+            for previous_section in script_parser.sections():  # Forget the previous script.
+                script_parser.remove_section(previous_section)
+            script_parser.defaults().clear()  # A [DEFAULT] section would otherwise leak into the next scripts.
             try:
                 script_parser.read_string(script_str)
             except configparser.Error as e:
                 Logger.error("Stored post-processing scripts have syntax errors: {err}".format(err = str(e)))
                 continue
-            for script_name, settings in script_parser.items():  # There should only be one, really! Otherwise we can't guarantee the order or allow multiple uses of the same script.
-                if script_name == "DEFAULT":  # ConfigParser always has a DEFAULT section, but we don't fill it. Ignore this one.
-                    continue
+            for script_name in script_parser.sections():  # There should only be one, really! Otherwise we can't guarantee the order or allow multiple uses of the same script.
+                settings = script_parser[script_name]
                 if script_name not in self._loaded_scripts:  # Don't know this post-processing plug-in.
                     Logger.log("e",
                                "Unknown post-processing script {script_name} was encountered in this global stack.".format(
@@ -294,13 +569,16 @@ class PostProcessingPlugin(QObject, Extension):
                 for setting_key, setting_value in settings.items():  # Put all setting values into the script.
                     if new_script._instance is not None:
                         new_script._instance.setProperty(setting_key, "value", setting_value)
-                self._script_list.append(new_script)
+                self._script_instances.append(new_script)
+                self._script_keys.append(script_name)
+        self._script_list_model.setStringList(self.scriptList)
 
-        self.setSelectedScriptIndex(0)
-        # Ensure that we always force an update (otherwise the fields don't update correctly!)
-        self.selectedIndexChanged.emit()
-        self.scriptListChanged.emit()
-        self._propertyChanged()
+        with self._mutationScope():
+            self.setSelectedScriptIndex(0)
+            # Ensure that we always force an update (otherwise the fields don't update correctly!)
+            self._dirty_script_list = True
+            self._dirty_selection = True
+            self._dirty_property = True
 
     def _onGlobalContainerStackChanged(self) -> None:
         """When the global container stack is changed, swap out the list of active scripts."""
@@ -316,19 +594,14 @@ class PostProcessingPlugin(QObject, Extension):
     @pyqtSlot()
     def writeScriptsToStack(self) -> None:
         script_list_strs = []  # type: List[str]
-        for script in self._script_list:
-            parser = configparser.ConfigParser(interpolation = None)  # We'll encode the script as a config with one section. The section header is the key and its values are the settings.
-            parser.optionxform = str  # type: ignore # Don't transform the setting keys as they are case-sensitive.
-            script_name = script.getSettingData()["key"]
-            parser.add_section(script_name)
-            for key in script.getSettingData()["settings"]:
-                value = script.getSettingValueByKey(key)
-                parser[script_name][key] = str(value)
-            serialized = io.StringIO()  # ConfigParser can only write to streams. Fine.
-            parser.write(serialized)
-            serialized.seek(0)
-            script_str = serialized.read()
-            script_str = script_str.replace("\\\\", r"\\\\").replace("\n", r"\\\n")  # Escape newlines because configparser sees those as section delimiters.
+        for script, script_key in zip(self._script_instances, self._script_keys):
+            setting_keys = self._script_setting_keys.get(script_key)
+            if setting_keys is None:  # Not one of the loaded scripts. Fall back to its own setting data.
+                setting_data = self._settingData(script)
+                script_key = setting_data["key"]
+                setting_keys = tuple(setting_data["settings"])
+            script_str = _serializeScript(script_key, ((key, script.getSettingValueByKey(key)) for key in setting_keys))
+            script_str = _escapeScript(script_str)  # Escape newlines because configparser sees those as section delimiters.
             script_list_strs.append(script_str)
 
         script_list_string = "\n".join(script_list_strs)  # ConfigParser should never output three newlines in a row when serialised, so it's a safe delimiter.
@@ -356,25 +629,55 @@ class PostProcessingPlugin(QObject, Extension):
 
         self.loadAllScripts()
 
-        # Create the plugin dialog component
-        path = os.path.join(cast(str, PluginRegistry.getInstance().getPluginPath("PostProcessingPlugin")), "PostProcessingPlugin.qml")
-        self._view = CuraApplication.getInstance().createQmlComponent(path, {"manager": self})
+        # Create the plugin dialog component. The dialog itself is loaded asynchronously by this shell.
+        plugin_path = cast(str, PluginRegistry.getInstance().getPluginPath("PostProcessingPlugin"))
+        shell_path = os.path.join(plugin_path, "PostProcessingPluginShell.qml")
+        self._view_shell = CuraApplication.getInstance().createQmlComponent(shell_path, {"manager": self})
+        if self._view_shell is None:
+            Logger.log("e", "Not creating PostProcessing button near save button because the QML component failed to be created.")
+            return
+        self._view_shell.setProperty("source", QUrl.fromLocalFile(os.path.join(plugin_path, "PostProcessingPlugin.qml")))
+
+    @pyqtSlot()
+    def onViewLoaded(self) -> None:
+        """Called by the view shell when the view has finished loading in the background."""
+
+        if self._view_shell is None:
+            return
+        self._view = self._view_shell.property("dialog")
         if self._view is None:
             Logger.log("e", "Not creating PostProcessing button near save button because the QML component failed to be created.")
             return
         Logger.log("d", "Post processing view created.")
 
         # Create the save button component
-        CuraApplication.getInstance().addAdditionalComponent("saveButton", self._view.findChild(QObject, "postProcessingSaveAreaButton"))
+        CuraApplication.getInstance().addAdditionalComponent("saveButton", self._view.property("saveAreaButton"))
+
+        if self._show_view_when_loaded:
+            self._show_view_when_loaded = False
+            self._view.show()
+
+    @pyqtSlot()
+    def onViewLoadFailed(self) -> None:
+        """Called by the view shell when the view failed to load in the background."""
+
+        Logger.log("e", "Not creating PostProcessing window since the QML component failed to be created.")
+        if self._view_shell is not None:
+            self._view_shell.deleteLater()
+        self._view_shell = None  # Try creating it again the next time it is shown.
+        self._show_view_when_loaded = False
 
     def showPopup(self) -> None:
         """Show the (GUI) popup of the post processing plugin."""
 
         if self._view is None:
-            self._createView()
-            if self._view is None:
-                Logger.log("e", "Not creating PostProcessing window since the QML component failed to be created.")
-                return
+            if self._view_shell is None:
+                self._createView()
+                if self._view_shell is None:
+                    Logger.log("e", "Not creating PostProcessing window since the QML component failed to be created.")
+                    return
+            self._show_view_when_loaded = True  # Still loading. Show it as soon as it's done.
+            return
         self._view.show()
 
     def _propertyChanged(self) -> None:
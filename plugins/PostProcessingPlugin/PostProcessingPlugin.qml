@@ -20,6 +20,7 @@ UM.Dialog
     minimumWidth: 400 * screenScaleFactor
     minimumHeight: 250 * screenScaleFactor
     backgroundColor: UM.Theme.getColor("main_background")
+    property Item saveAreaButton: postProcessingSaveAreaButton  // So that the button can be added to the save area without searching for it.
     onVisibleChanged:
     {
         // Whenever the window is closed (either via the "Close" button or the X on the window frame), we want to update it in the stack.
@@ -76,7 +77,7 @@ UM.Dialog
                 {
                     id: activeScriptsScrollBar
                 }
-                model: manager.scriptList
+                model: manager.scriptListModel
 
                 delegate: Button
                 {
@@ -92,7 +93,7 @@ UM.Dialog
                     {
                         if (manager.selectedScriptIndex == index)
                         {
-                            base.activeScriptName = manager.getScriptLabelByKey(modelData.toString())
+                            base.activeScriptName = manager.getScriptLabelByKey(model.display)
                             return true
                         }
                         else
@@ -110,7 +111,7 @@ UM.Dialog
                     {
                         forceActiveFocus()
                         manager.setSelectedScriptIndex(index)
-                        base.activeScriptName = manager.getScriptLabelByKey(modelData.toString())
+                        base.activeScriptName = manager.getScriptLabelByKey(model.display)
                     }
 
                     RowLayout
@@ -122,7 +123,7 @@ UM.Dialog
                             Layout.fillWidth: true
                             Layout.preferredHeight: height
                             elide: Text.ElideRight
-                            text: manager.getScriptLabelByKey(modelData.toString())
+                            text: manager.getScriptLabelByKey(model.display)
                         }
 
                         Item
@@ -130,7 +131,7 @@ UM.Dialog
                             id: downButton
                             Layout.preferredWidth: height
                             Layout.fillHeight: true
-                            enabled: index != manager.scriptList.length - 1
+                            enabled: index != activeScriptsList.count - 1
 
                             MouseArea
                             {
@@ -225,12 +226,12 @@ UM.Dialog
 
             Models.Instantiator
             {
-                model: manager.loadedScriptList
+                model: manager.loadedScriptListModel
 
                 Cura.MenuItem
                 {
-                    text: manager.getScriptLabelByKey(modelData.toString())
-                    onTriggered: manager.addScriptToList(modelData.toString())
+                    text: manager.getScriptLabelByKey(model.display)
+                    onTriggered: manager.addScriptToList(model.display)
                 }
 
                 onObjectAdded: function(index, object) { scriptsMenu.insertItem(index, object)}
@@ -449,6 +450,7 @@ UM.Dialog
 
     Item
     {
+        id: postProcessingSaveAreaButton
         objectName: "postProcessingSaveAreaButton"
         visible: activeScriptsList.count > 0
         height: UM.Theme.getSize("action_button").height
@@ -0,0 +1,25 @@
+// Copyright (c) 2022 Jaime van Kessel, Ultimaker B.V.
+// The PostProcessingPlugin is released under the terms of the LGPLv3 or higher.
+
+import QtQuick 2.2
+
+// Loads the post processing dialog in the background, so that creating the view doesn't block the interface.
+Item
+{
+    property alias source: dialogLoader.source
+    property alias dialog: dialogLoader.item
+
+    Loader
+    {
+        id: dialogLoader
+        asynchronous: true
+        onLoaded: manager.onViewLoaded()
+        onStatusChanged:
+        {
+            if (status == Loader.Error)
+            {
+                manager.onViewLoadFailed()
+            }
+        }
+    }
+}
@@ -14,6 +14,7 @@ from UM.Settings.InstanceContainer import InstanceContainer
 from UM.Settings.DefinitionContainer import DefinitionContainer
 from UM.Settings.ContainerRegistry import ContainerRegistry
 
+import io
 import re
 import json
 import collections
@@ -188,3 +189,18 @@ class Script:
         It gets a list of g-code strings and needs to return a (modified) list.
         """
         raise NotImplementedError()
+
+    def executeStream(self, stream: io.StringIO) -> io.StringIO:
+        """Alternative to execute that gets all g-code as a single stream, instead of a list of layers.
+
+        Scripts may implement this in addition to execute. If all active scripts implement it, the g-code is joined
+        only once and the stream is passed from one script to the next, rather than copying the g-code in every script.
+        The stream is positioned at the start. It needs to return a stream with the (modified) g-code, which may be the
+        same stream. The g-code of every layer has to keep starting with a ``;LAYER:`` line.
+        """
+        raise NotImplementedError()
+
+    def hasStreamSupport(self) -> bool:
+        """Whether this script implements executeStream."""
+
+        return type(self).executeStream is not Script.executeStream
@@ -30,11 +30,17 @@
 from ..Script import Script
 from UM.Application import Application
 from UM.Qt.Duration import DurationFormat
-import time
 import datetime
-import math
+import re
 from UM.Message import Message
 
+# The header values that the progress is computed from.
+_HDR_RE = re.compile(r"^;(TIME|LAYER_COUNT):(\d+)", re.MULTILINE)
+# The lines with the layer count and the start of each layer, to display the filename and layer with.
+_LAYER_LINE_RE = re.compile(r"^;LAYER(?:_COUNT)?:.*$", re.MULTILINE)
+# The start of a layer, to display the progress after.
+_LAYER_RE = re.compile(r"^;LAYER:", re.MULTILINE)
+
 class DisplayInfoOnLCD(Script):
 
     def getSettingDataString(self):
@@ -189,51 +195,60 @@ class DisplayInfoOnLCD(Script):
         add_m73_line = self.getSettingValueByKey("add_m73_line")
         add_m73_time = self.getSettingValueByKey("add_m73_time")
         add_m73_percent = self.getSettingValueByKey("add_m73_percent")
+        speed_factor = self.getSettingValueByKey("speed_factor") / 100
+        enable_end_message = self.getSettingValueByKey("enable_end_message")
 
     # This is Display Filename and Layer on LCD---------------------------------------------------------
         if display_option == "filename_layer":
-            max_layer = 0
-            lcd_text = "M117 "
-            if self.getSettingValueByKey("file_name") != "":
-                file_name = self.getSettingValueByKey("file_name")
-            else:
+        # get settings
+            scroll = self.getSettingValueByKey("format_option")
+            file_name = self.getSettingValueByKey("file_name")
+            start_num = self.getSettingValueByKey("startNum")
+            display_max_layer = self.getSettingValueByKey("maxlayer")
+            max_layer = "0"
+            lcd_text = ""
+            if file_name == "":
                 file_name = Application.getInstance().getPrintInformation().jobName
             if self.getSettingValueByKey("addPrefixPrinting"):
                 lcd_text += "Printing "
-            if not self.getSettingValueByKey("scroll"):
+            if not scroll:
                 lcd_text += "Layer "
+                file_name_suffix = " " + file_name
             else:
                 lcd_text += file_name + " - Layer "
-            i = self.getSettingValueByKey("startNum")
-            for layer in data:
-                display_text = lcd_text + str(i)
-                layer_index = data.index(layer)
-                lines = layer.split("\n")
-                for line in lines:
+                file_name_suffix = ""
+        # the text after the layer number only changes when the layer count is found
+            if display_max_layer:
+                layer_suffix = " of " + max_layer + file_name_suffix
+            else:
+                layer_suffix = file_name_suffix + "!"
+            i = start_num
+            for layer_index, layer in enumerate(data):
+        # splice the text in after every ;LAYER: line, without splitting the layer into lines
+                layer_parts = []
+                part_start = 0
+                for match in _LAYER_LINE_RE.finditer(layer):
+                    line = match.group()
                     if line.startswith(";LAYER_COUNT:"):
                         max_layer = line
                         max_layer = max_layer.split(":")[1]
-                        if self.getSettingValueByKey("startNum") == 0:
+                        if start_num == 0:
                             max_layer = str(int(max_layer) - 1)
-                    if line.startswith(";LAYER:"):
-                        if self.getSettingValueByKey("maxlayer"):
-                            display_text = display_text + " of " + max_layer
-                            if not self.getSettingValueByKey("scroll"):
-                                display_text = display_text + " " + file_name
-                        else:
-                            if not self.getSettingValueByKey("scroll"):
-                                display_text = display_text + " " + file_name + "!"
-                            else:
-                                display_text = display_text + "!"
-                        line_index = lines.index(line)
-                        lines.insert(line_index + 1, display_text)
+                        if display_max_layer:
+                            layer_suffix = " of " + max_layer + file_name_suffix
+                    else:
+                        display_text = lcd_text + str(i) + layer_suffix
+                        layer_parts.append(layer[part_start:match.end()])
+                        layer_parts.append("\nM117 " + display_text)
                         if add_m118_line:
-                            lines.insert(line_index + 2, str(display_text.replace("M117", "M118", 1)))
+                            layer_parts.append("\nM118 " + display_text)
+                        part_start = match.end()
                         i += 1
-                final_lines = "\n".join(lines)
-                data[layer_index] = final_lines
-            if bool(self.getSettingValueByKey("enable_end_message")):
-                message_str = self.message_to_user(self.getSettingValueByKey("speed_factor") / 100)
+                if layer_parts:
+                    layer_parts.append(layer[part_start:])
+                    data[layer_index] = "".join(layer_parts)
+            if enable_end_message:
+                message_str = self.message_to_user(speed_factor)
                 Message(title = "Display Info on LCD - Estimated Finish Time", text = message_str[0] + "\n\n" + message_str[1] + "\n" + message_str[2] + "\n" + message_str[3]).show()
             return data
 
@@ -242,74 +257,73 @@ class DisplayInfoOnLCD(Script):
         # get settings
             display_total_layers = self.getSettingValueByKey("display_total_layers")
             display_remaining_time = self.getSettingValueByKey("display_remaining_time")
-            speed_factor = self.getSettingValueByKey("speed_factor") / 100
-            m73_time = False
-            m73_percent = False
-            if add_m73_line and add_m73_time:
-                m73_time = True
-            if add_m73_line and add_m73_percent:
-                m73_percent = True
+            countdown_to_pause = self.getSettingValueByKey("countdown_to_pause")
+            m73_time = add_m73_line and add_m73_time
+            m73_percent = add_m73_line and add_m73_percent
         # initialize global variables
             first_layer_index = 0
             time_total = 0
             number_of_layers = 0
             time_elapsed = 0
-        # if at least one of the settings is disabled, there is enough room on the display to display "layer"
+        # read the number of layers and the total time from the header, and add the time estimates to it
             first_section = data[0]
             lines = first_section.split("\n")
-            for line in lines:
-                if line.startswith(";TIME:"):
-                    tindex = lines.index(line)
+            for tindex, line in enumerate(lines):
+                if line.startswith(";LAYER_COUNT:"):
+                    number_of_layers = int(line.split(":")[1])
+                elif line.startswith(";TIME:"):
                     cura_time = int(line.split(":")[1])
+                    time_total = cura_time
                     print_time = cura_time * speed_factor
-                    hhh = print_time/3600
-                    hr = round(hhh // 1)
-                    mmm = round((hhh % 1) * 60)
-                    orig_hhh = cura_time/3600
-                    orig_hr = round(orig_hhh // 1)
-                    orig_mmm = math.floor((orig_hhh % 1) * 60)
-                    orig_sec = round((((orig_hhh % 1) * 60) % 1) * 60)
-                    if add_m118_line: lines.insert(tindex + 3,"M118 Adjusted Print Time " + str(hr) + "hr " + str(mmm) + "min")
-                    lines.insert(tindex + 3,"M117 ET " + str(hr) + "hr " + str(mmm) + "min")
-                    # add M73 line at beginning
-                    mins = int(60 * hr + mmm)
-                    if m73_time:
-                        lines.insert(tindex + 3, "M73 R{}".format(mins))
-                    if m73_percent:
-                        lines.insert(tindex + 3, "M73 P0")
+                    hr, mmm = divmod(round(print_time / 60), 60)  # rounded to whole minutes
+                    orig_hr, orig_sec = divmod(cura_time, 3600)
+                    orig_mmm, orig_sec = divmod(orig_sec, 60)
                     # If Countdonw to pause is enabled then count the pauses
                     pause_str = ""
-                    if bool(self.getSettingValueByKey("countdown_to_pause")):
+                    if countdown_to_pause:
                         pause_count = 0
                         for num in range(2,len(data) - 1, 1):
                             if "PauseAtHeight.py" in data[num]:
                                 pause_count += 1
                             pause_str = f" with {pause_count} pause(s)"
                     # This line goes in to convert seconds to hours and minutes
-                    lines.insert(tindex + 3, f";Cura Time Estimate:  {cura_time}sec = {orig_hr}hr {orig_mmm}min {orig_sec}sec {pause_str}")
+                    header_lines = [f";Cura Time Estimate:  {cura_time}sec = {orig_hr}hr {orig_mmm}min {orig_sec}sec {pause_str}"]
+                    # add M73 line at beginning
+                    mins = int(60 * hr + mmm)
+                    if m73_percent:
+                        header_lines.append("M73 P0")
+                    if m73_time:
+                        header_lines.append("M73 R{}".format(mins))
+                    header_lines.append("M117 ET " + str(hr) + "hr " + str(mmm) + "min")
+                    if add_m118_line:
+                        header_lines.append("M118 Adjusted Print Time " + str(hr) + "hr " + str(mmm) + "min")
+                    lines[tindex + 3:tindex + 3] = header_lines
                     data[0] = "\n".join(lines)
                     data[len(data)-1] += "M117 Orig Cura Est " + str(orig_hr) + "hr " + str(orig_mmm) + "min\n"
                     if add_m118_line: data[len(data)-1] += "M118 Est w/FudgeFactor  " + str(speed_factor * 100) + "% was " + str(hr) + "hr " + str(mmm) + "min\n"
+        # if at least one of the settings is disabled, there is enough room on the display to display "layer"
             if not display_total_layers or not display_remaining_time:
                 base_display_text = "layer "
             else:
                 base_display_text = ""
+        # move the end marker to the end, unless it's only there already
+            end_marker = ";End of Gcode\n"
             layer = data[len(data)-1]
-            data[len(data)-1] = layer.replace(";End of Gcode" + "\n", "")
-            data[len(data)-1] += ";End of Gcode" + "\n"
-        # Search for the number of layers and the total time from the start code
+            if not layer.endswith(end_marker) or layer.find(end_marker) < len(layer) - len(end_marker):
+                data[len(data)-1] = layer.replace(end_marker, "") + end_marker
+        # Search for the number of layers and the total time from the rest of the start code
             for index in range(len(data)):
                 data_section = data[index]
         # We have everything we need, save the index of the first layer and exit the loop
                 if ";LAYER:" in data_section:
                     first_layer_index = index
                     break
-                else:
-                    for line in data_section.split("\n"):
-                        if line.startswith(";LAYER_COUNT:"):
-                            number_of_layers = int(line.split(":")[1])
-                        elif line.startswith(";TIME:"):
-                            time_total = int(line.split(":")[1])
+                elif index > 0:  # The header was read already.
+                    for match in _HDR_RE.finditer(data_section):
+                        if match.group(1) == "LAYER_COUNT":
+                            number_of_layers = int(match.group(2))
+                        else:
+                            time_total = int(match.group(2))
         # for all layers...
             current_layer = 0
             for layer_counter in range(len(data)-2):
@@ -317,9 +331,9 @@ class DisplayInfoOnLCD(Script):
                 layer_index = first_layer_index + layer_counter
                 display_text = base_display_text
                 display_text += str(current_layer)
-        # create a list where each element is a single line of code within the layer
-                lines = data[layer_index].split("\n")
-                if not ";LAYER:" in data[layer_index]:
+                layer = data[layer_index]
+                layer_match = _LAYER_RE.search(layer)
+                if layer_match is None:
                     current_layer -= 1
                     continue
         # add the total number of layers if this option is checked
@@ -343,75 +357,78 @@ class DisplayInfoOnLCD(Script):
                     display_text += time_remaining_display
         # find time_elapsed at the end of the layer (used to calculate the remaining time of the next layer)
                     if not current_layer == number_of_layers:
-                        for line_index in range(len(lines) - 1, -1, -1):
-                            line = lines[line_index]
-                            if line.startswith(";TIME_ELAPSED:"):
-        # update time_elapsed for the NEXT layer and exit the loop
-                                time_elapsed = int(float(line.split(":")[1]))
-                                break
+                        time_pos = layer.rfind("\n;TIME_ELAPSED:")
+                        if time_pos >= 0:
+        # update time_elapsed for the NEXT layer
+                            time_pos += len("\n;TIME_ELAPSED:")
+                            time_end = layer.find("\n", time_pos)
+                            if time_end < 0:
+                                time_end = len(layer)
+                            time_elapsed = int(float(layer[time_pos:time_end]))
         # insert the text AFTER the first line of the layer (in case other scripts use ";LAYER:")
-                for l_index, line in enumerate(lines):
-                    if line.startswith(";LAYER:"):
-                        lines[l_index] += "\nM117 " + display_text
-                        # add M73 line
-                        mins = int(60 * h + m)
-                        if m73_time:
-                            lines[l_index] += "\nM73 R{}".format(mins)
-                        if m73_percent:
-                            lines[l_index] += "\nM73 P" + str(round(int(current_layer) / int(number_of_layers) * 100))
-                        if add_m118_line:
-                            lines[l_index] += "\nM118 " + display_text
-                        break
+                new_lines = "\nM117 " + display_text
+                # add M73 line
+                mins = int(60 * h + m)
+                if m73_time:
+                    new_lines += "\nM73 R{}".format(mins)
+                if m73_percent:
+                    new_lines += "\nM73 P" + str(round(int(current_layer) / int(number_of_layers) * 100))
+                if add_m118_line:
+                    new_lines += "\nM118 " + display_text
+                line_end = layer.find("\n", layer_match.end())
+                if line_end < 0:
+                    line_end = len(layer)
         # overwrite the layer with the modified layer
-                data[layer_index] = "\n".join(lines)
+                data[layer_index] = layer[:line_end] + new_lines + layer[line_end:]
 
-        # If enabled then change the ET to TP for 'Time To Pause'
-            if bool(self.getSettingValueByKey("countdown_to_pause")):
-                time_list = []
-                time_list.append("0")
-                time_list.append("0")
+        # If enabled then change the ET to TP for 'Time To Pause', if there are any pauses to count down to
+            if countdown_to_pause and any("PauseAtHeight.py" in data[num] for num in range(2, len(data) - 1)):
+                time_list = [0.0, 0.0]  # The time until the next pause for the layers before a pause, else the time elapsed.
+                is_pause = [False, False]  # Whether the time of that layer is the time until the next pause.
                 this_time = 0
                 pause_index = 1
+                layer_lines = [data_section.split("\n") for data_section in data]
 
         # Get the layer times
                 for num in range(2,len(data) - 1):
-                    layer = data[num]
-                    lines = layer.split("\n")
-                    for line in lines:
+                    for line in layer_lines[num]:
                         if line.startswith(";TIME_ELAPSED:"):
                             this_time = (float(line.split(":")[1]))*speed_factor
-                            time_list.append(str(this_time))
-                            if "PauseAtHeight.py" in layer:
+                            time_list.append(this_time)
+                            is_pause.append(False)
+                            if "PauseAtHeight.py" in data[num]:
                                 for qnum in range(num - 1, pause_index, -1):
-                                    time_list[qnum] = str(float(this_time) - float(time_list[qnum])) + "P"
+                                    time_list[qnum] = this_time - time_list[qnum]
+                                    is_pause[qnum] = True
                                 pause_index = num-1
 
         # Make the adjustments to the M117 (and M118) lines that are prior to a pause
                 for num in range (2, len(data) - 1,1):
-                    layer = data[num]
-                    lines = layer.split("\n")
-                    for line in lines:
-                        if line.startswith("M117") and "|" in line and "P" in time_list[num]:
+                    lines = layer_lines[num]
+                    for line_index, line in enumerate(lines):
+                        if line.startswith("M117") and "|" in line and is_pause[num]:
                             M117_line = line.split("|")[0] + "| TP "
-                            alt_time = time_list[num][:-1]
-                            hhh = int(float(alt_time) / 3600)
+                            alt_time = time_list[num]
+                            hhh = int(alt_time / 3600)
                             if hhh > 0:
                                 hhr = str(hhh) + "h"
                             else:
                                 hhr = ""
-                            mmm = ((float(alt_time) / 3600) - (int(float(alt_time) / 3600))) * 60
+                            mmm = ((alt_time / 3600) - (int(alt_time / 3600))) * 60
                             sss = int((mmm - int(mmm)) * 60)
                             mmm = str(round(mmm)) + "m"
                             time_to_go = str(hhr) + str(mmm)
                             if hhr == "": time_to_go = time_to_go + str(sss) + "s"
                             M117_line = M117_line + time_to_go
-                            layer = layer.replace(line, M117_line)
-                        if line.startswith("M118") and "|" in line and "P" in time_list[num]:
+                            lines[line_index] = M117_line
+                        if line.startswith("M118") and "|" in line and is_pause[num]:
                             M118_line = line.split("|")[0] + "| TP " + time_to_go
-                            layer = layer.replace(line, M118_line)
-                    data[num] = layer
+                            lines[line_index] = M118_line
+
+        # overwrite the layers with the modified layers
+                data[:] = ["\n".join(lines) for lines in layer_lines]
             setting_data = ""
-            if bool(self.getSettingValueByKey("enable_end_message")):
+            if enable_end_message:
                 message_str = self.message_to_user(speed_factor)
                 Message(title = "[Display Info on LCD] - Estimated Finish Time", text = message_str[0] + "\n\n" + message_str[1] + "\n" + message_str[2] + "\n" + message_str[3]).show()
         return data
@@ -423,22 +440,19 @@ class DisplayInfoOnLCD(Script):
         # If the user entered a print start time make sure it is in the correct format or ignore it.
         if print_start_time == "" or print_start_time == "0" or len(print_start_time) != 5 or not ":" in print_start_time:
             print_start_time = ""
+        #Get the current data/time info
+        now = datetime.datetime.now()
         # Change the print start time to proper time format, or, use the current time
         if print_start_time != "":
             hr = int(print_start_time.split(":")[0])
             min = int(print_start_time.split(":")[1])
             sec = 0
         else:
-            hr = int(time.strftime("%H"))
-            min = int(time.strftime("%M"))
-            sec = int(time.strftime("%S"))
-
-        #Get the current data/time info
-        yr = int(time.strftime("%Y"))
-        day = int(time.strftime("%d"))
-        mo = int(time.strftime("%m"))
+            hr = now.hour
+            min = now.minute
+            sec = now.second
 
-        date_and_time = datetime.datetime(yr, mo, day, hr, min, sec)
+        date_and_time = datetime.datetime(now.year, now.month, now.day, hr, min, sec)
         #Split the Cura print time
         pr_hr = int(print_time.split(":")[0])
         pr_min = int(print_time.split(":")[1])
@@ -448,26 +462,24 @@ class DisplayInfoOnLCD(Script):
         #Adjust the total seconds by the Fudge Factor
         adjusted_print_time = print_seconds * speed_factor
         #Break down the adjusted seconds back into hh:mm:ss
-        adj_hr = int(adjusted_print_time/3600)
-        print_seconds = adjusted_print_time - (adj_hr * 3600)
-        adj_min = int(print_seconds) / 60
-        adj_sec = int(print_seconds - (adj_min * 60))
+        adj_hr, adj_sec = divmod(int(adjusted_print_time), 3600)
+        adj_min, adj_sec = divmod(adj_sec, 60)
         #Get the print time to add to the start time
         time_change = datetime.timedelta(hours=adj_hr, minutes=adj_min, seconds=adj_sec)
         new_time = date_and_time + time_change
         #Get the day of the week that the print will end on
-        week_day = str(["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"][int(new_time.strftime("%w"))])
+        week_day = str(["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"][new_time.isoweekday() % 7])
         #Get the month that the print will end in
-        mo_str = str(["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"][int(new_time.strftime("%m"))-1])
+        mo_str = str(["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"][new_time.month - 1])
         #Make adjustments from 24hr time to 12hr time
-        if int(new_time.strftime("%H")) > 12:
-            show_hr = str(int(new_time.strftime("%H")) - 12) + ":"
+        if new_time.hour > 12:
+            show_hr = str(new_time.hour - 12) + ":"
             show_ampm = " PM"
-        elif int(new_time.strftime("%H")) == 0:
+        elif new_time.hour == 0:
             show_hr = "12:"
             show_ampm = " AM"
         else:
-            show_hr = str(new_time.strftime("%H")) + ":"
+            show_hr = f"{new_time:%H}:"
             show_ampm = " AM"
         if print_start_time == "":
             start_str = "Now"
@@ -479,5 +491,5 @@ class DisplayInfoOnLCD(Script):
             print_start_str = "Print Start Time.................Now."
         estimate_str = "Cura Time Estimate.........." + str(print_time)
         adjusted_str = "Adjusted Time Estimate..." + str(time_change)
-        finish_str = week_day + " " + str(mo_str) + " " + str(new_time.strftime("%d")) + ", " + str(new_time.strftime("%Y")) + " at " + str(show_hr) + str(new_time.strftime("%M")) + str(show_ampm)
+        finish_str = f"{week_day} {mo_str} {new_time:%d}, {new_time:%Y} at {show_hr}{new_time:%M}{show_ampm}"
         return finish_str, estimate_str, adjusted_str, print_start_str
\ No newline at end of file
@@ -1,14 +1,21 @@
 # Copyright (c) 2020 Ultimaker B.V.
 # Cura is released under the terms of the LGPLv3 or higher.
 
+import configparser
+import io
 import os
+import random
+import re
 import sys
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 from UM.PluginRegistry import PluginRegistry
 from UM.Resources import Resources
 from UM.Trust import Trust
-from ..PostProcessingPlugin import PostProcessingPlugin
+from ..PostProcessingPlugin import PostProcessingPlugin, _escapeScript, _serializeScript, _unescapeScript
+from ..Script import Script
 
 # not sure if needed
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -57,6 +64,145 @@ def test_enterprise_bundled_script_allowed():
     assert PostProcessingPlugin._isScriptAllowed(_bundled_file_path())
 
 
+class StreamScript(Script):
+    """A script that adds a line after the start of each layer, and one at the end, working on a stream."""
+
+    def executeStream(self, stream: io.StringIO) -> io.StringIO:
+        gcode = re.sub(r"^(;LAYER:\d+\n)", r"\1M117 Streamed\n", stream.getvalue(), flags = re.MULTILINE)
+        return io.StringIO(gcode + "M117 Done\n")
+
+
+class UnchangedStreamScript(Script):
+    """A script that passes the stream on without changing it."""
+
+    def executeStream(self, stream: io.StringIO) -> io.StringIO:
+        return stream
+
+
+class AddLayerStreamScript(Script):
+    """A script that adds a layer before the end g-code."""
+
+    def executeStream(self, stream: io.StringIO) -> io.StringIO:
+        gcode = stream.getvalue()
+        end_start = gcode.index(";End of Gcode")
+        return io.StringIO(gcode[:end_start] + ";LAYER:2\nG1\n" + gcode[end_start:])
+
+
+class RemoveLayerStreamScript(Script):
+    """A script that removes the last layer."""
+
+    def executeStream(self, stream: io.StringIO) -> io.StringIO:
+        return io.StringIO(stream.getvalue().replace(";LAYER:1\nG1\n", ""))
+
+
+def _gcode_list():
+    return [
+        ";FLAVOR:Marlin\n;TIME:100\n;Generated with Cura_SteamEngine\n",
+        ";LAYER_COUNT:2\nG28\nG92 E0\n",
+        ";LAYER:0\nG1 X10 Y10 E1\n;TIME_ELAPSED:50.0\n",
+        ";LAYER:1\nG1 X20 Y20 E2\n;TIME_ELAPSED:100.0\n",
+        ";End of Gcode\nM104 S0\n"
+    ]
+
+
+def _gcode_list_with_empty_section():
+    return [";FLAVOR:Marlin\n", ";LAYER_COUNT:2\n", ";LAYER:0\nG1\n", ";LAYER:1\nG1\n", "", ";End of Gcode\n"]
+
+
+# noinspection PyProtectedMember
+@pytest.mark.parametrize("gcode_list", [
+    _gcode_list(),
+    _gcode_list_with_empty_section(),
+    # The first line of the end g-code is in the last layer too.
+    [";FLAVOR:Marlin\n", ";LAYER_COUNT:1\n", ";LAYER:0\n;End of Gcode\nM117 hi\nG28\n", "G28\n"]
+])
+def test_execute_streamed_unchanged(gcode_list):
+    plugin = MagicMock(_script_instances = [UnchangedStreamScript()])
+
+    result = PostProcessingPlugin._executeStreamed(plugin, gcode_list)
+
+    assert len(result) == len(gcode_list)
+    assert result == gcode_list
+
+
+# noinspection PyProtectedMember
+def test_execute_streamed_keeps_sections():
+    gcode_list = _gcode_list()
+    plugin = MagicMock(_script_instances = [StreamScript(), UnchangedStreamScript()])
+
+    result = PostProcessingPlugin._executeStreamed(plugin, gcode_list)
+
+    assert len(result) == len(gcode_list)
+    assert result[0] == gcode_list[0]  # Header.
+    assert result[1] == gcode_list[1]  # Start g-code.
+    assert result[2] == ";LAYER:0\nM117 Streamed\nG1 X10 Y10 E1\n;TIME_ELAPSED:50.0\n"
+    assert result[3] == ";LAYER:1\nM117 Streamed\nG1 X20 Y20 E2\n;TIME_ELAPSED:100.0\n"
+    assert result[4] == gcode_list[4] + "M117 Done\n"  # End g-code.
+
+
+# noinspection PyProtectedMember
+@pytest.mark.parametrize("script_type, expected", [
+    (AddLayerStreamScript, [";FLAVOR:Marlin\n", ";LAYER_COUNT:2\n", ";LAYER:0\nG1\n", ";LAYER:1\nG1\n", ";LAYER:2\nG1\n", ";End of Gcode\n"]),
+    (RemoveLayerStreamScript, [";FLAVOR:Marlin\n", ";LAYER_COUNT:2\n", ";LAYER:0\nG1\n", ";End of Gcode\n"])
+])
+def test_execute_streamed_changed_layer_count(script_type, expected):
+    gcode_list = _gcode_list_with_empty_section()
+    plugin = MagicMock(_script_instances = [script_type()])
+
+    result = PostProcessingPlugin._executeStreamed(plugin, gcode_list)
+
+    assert result == expected
+
+
+@pytest.mark.parametrize("setting_values", [
+    [],
+    [("layer", 5), ("enabled", True), ("speed", 12.5)],
+    [("path", "C:\\gcode\\\\scripts\\"), ("escaped", "\\n is not a newline")],
+    [("gcode", "G28\nG1 X10\n\nM117 Done")],
+    [("empty", ""), ("none", None), ("trailing_newline", "M400\n")],
+    [("CaseSensitiveKey", "value with = and : in it"), ("text", "  leading and trailing spaces  ")]
+])
+def test_serialize_script_like_configparser(setting_values):
+    parser = configparser.ConfigParser(interpolation = None)
+    parser.optionxform = str
+    parser.add_section("TestScript")
+    for key, value in setting_values:
+        parser["TestScript"][key] = str(value)
+    expected = io.StringIO()
+    parser.write(expected)
+
+    assert _serializeScript("TestScript", setting_values) == expected.getvalue()
+
+
+@pytest.mark.parametrize("setting_values", [
+    [("layer", "5"), ("enabled", "True")],
+    [("path", "C:\\gcode\\\\scripts\\"), ("escaped", "\\n is not a newline")],
+    [("gcode", "G28\nG1 X10\n\nM117 Done")],
+    [("empty", ""), ("backslash_before_newline", "M117 \\\nG28")]
+])
+def test_stored_script_round_trip(setting_values):
+    stored = _escapeScript(_serializeScript("TestScript", setting_values))
+    assert "\n" not in stored  # Every script is stored on a single line.
+
+    parser = configparser.ConfigParser(interpolation = None)
+    parser.optionxform = str
+    parser.read_string(_unescapeScript(stored))
+
+    assert parser.sections() == ["TestScript"]
+    assert list(parser["TestScript"].items()) == setting_values
+
+
+def test_escape_like_sequential_replace():
+    """The escaping is done in a single pass, which needs to give the same result as the replacements stored scripts
+    were written and read with before."""
+
+    rng = random.Random(1)
+    for _ in range(10000):
+        text = "".join(rng.choice(["\\", "\n", "n", "a"]) for _ in range(rng.randint(0, 12)))
+        assert _escapeScript(text) == text.replace("\\\\", r"\\\\").replace("\n", r"\\\n")
+        assert _unescapeScript(text) == text.replace(r"\\\n", "\n").replace(r"\\\\", "\\\\")
+
+
 def _bundled_file_path():
     return os.path.join(
         Resources.getStoragePath(Resources.Resources) + "scripts/blaat.py"